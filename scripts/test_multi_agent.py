@@ -85,7 +85,6 @@ class MultiAgentTester:
             else:
                 print(f"      ❌ 回复为��！没有添加到历史记录中")
 
-            time.sleep(0.1)
 
         return {"agent_results": agent_results, "conversation_timeline": conversation_timeline}
 
@@ -132,7 +131,6 @@ class MultiAgentTester:
                 "total_chars": len(message)
             })
 
-            time.sleep(0.1)
 
         return {"agent_results": agent_results, "conversation_timeline": conversation_timeline}
 
@@ -3,10 +3,26 @@
 主测试运行器 - 协调所有测试并生成综合报告
 """
 
+import dataclasses
 import json
+import queue
+import threading
 import time
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 长跑会打出成百上千行per-turn日志，行缓冲下每行都是一次write()系统调用；
+# 改为块缓冲，只在阶段边界显式flush
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(line_buffering=False, write_through=False)
+
+_BANNER = "=" * 80
 from datetime import datetime
 from typing import Dict, Any
 from test_single_agent import SingleAgentTester
@@ -14,6 +30,37 @@ from test_multi_agent import MultiAgentTester
 from test_data_analyzer import TestDataAnalyzer
 
 
+# 结果文件由后台线程落盘：主线程序列化完入队即返回，
+# 磁盘写入与下一测试阶段的HTTP/CPU工作重叠
+_write_queue = queue.Queue()
+
+
+def _writer_loop():
+    while True:
+        path, payload = _write_queue.get()
+        try:
+            with open(path, 'wb') as f:
+                f.write(payload)
+        except Exception as e:
+            print(f"❌ Failed to write {path}: {e}")
+        finally:
+            _write_queue.task_done()
+
+
+_writer_thread = threading.Thread(target=_writer_loop, daemon=True)
+_writer_thread.start()
+
+
+def _dump_json(obj: Dict[str, Any], path: str):
+    """序列化后交给后台写盘线程（orjson优先，缺库时回退stdlib）"""
+    if orjson is not None:
+        payload = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_DATACLASS)
+    else:
+        payload = json.dumps(obj, ensure_ascii=False, indent=2,
+                             default=dataclasses.asdict).encode('utf-8')
+    _write_queue.put((path, payload))
+
+
 class TestRunner:
     def __init__(self):
         self.results_dir = "test_results"
@@ -30,6 +77,7 @@ class TestRunner:
         print("=" * 60)
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        t0 = time.monotonic()  # 计时用单调时钟，不受墙钟跳变影响
         results = {
             "test_run_id": f"pc_node_test_{timestamp}",
             "start_time": datetime.now().isoformat(),
@@ -37,45 +85,35 @@ class TestRunner:
             "errors": []
         }
 
-        # 运行单智能体测试
-        if not skip_single:
-            try:
+        # 单/多智能体测试互不共享状态（agent_id命名空间独立），
+        # 且都以HTTP I/O等待为主，并发执行时间上几乎完全重叠
+        futures = {}
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            if not skip_single:
                 print("\n🤖 Running Single Agent Tests...")
-                single_results = self.single_agent_tester.run_comparison_test()
-                results["single_agent_results"] = single_results
-                results["tests_completed"].append("single_agent")
+                futures["single"] = executor.submit(self.single_agent_tester.run_comparison_test)
 
-                # 保存单独的结果文件
-                single_file = os.path.join(self.results_dir, f"single_agent_{timestamp}.json")
-                with open(single_file, 'w', encoding='utf-8') as f:
-                    json.dump(single_results, f, ensure_ascii=False, indent=2)
-
-                print(f"✅ Single agent test completed - saved to {single_file}")
-
-            except Exception as e:
-                error_msg = f"Single agent test failed: {str(e)}"
-                print(f"❌ {error_msg}")
-                results["errors"].append(error_msg)
-
-        # 运行多智能体测试
-        if not skip_multi:
-            try:
+            if not skip_multi:
                 print("\n👥 Running Multi-Agent Tests...")
-                multi_results = self.multi_agent_tester.run_comparison_test()
-                results["multi_agent_results"] = multi_results
-                results["tests_completed"].append("multi_agent")
+                futures["multi"] = executor.submit(self.multi_agent_tester.run_comparison_test)
 
-                # 保存单独的结果文件
-                multi_file = os.path.join(self.results_dir, f"multi_agent_{timestamp}.json")
-                with open(multi_file, 'w', encoding='utf-8') as f:
-                    json.dump(multi_results, f, ensure_ascii=False, indent=2)
+            for name, future in futures.items():
+                try:
+                    sub_results = future.result()
+                    results[f"{name}_agent_results"] = sub_results
+                    results["tests_completed"].append(f"{name}_agent")
 
-                print(f"✅ Multi-agent test completed - saved to {multi_file}")
+                    # 保存单独的结果文件
+                    sub_file = os.path.join(self.results_dir, f"{name}_agent_{timestamp}.json")
+                    _dump_json(sub_results, sub_file)
 
-            except Exception as e:
-                error_msg = f"Multi-agent test failed: {str(e)}"
-                print(f"❌ {error_msg}")
-                results["errors"].append(error_msg)
+                    print(f"✅ {name.capitalize()} agent test completed - saved to {sub_file}")
+                    sys.stdout.flush()
+
+                except Exception as e:
+                    error_msg = f"{name.capitalize()} agent test failed: {str(e)}"
+                    print(f"❌ {error_msg}")
+                    results["errors"].append(error_msg)
 
         # 生成综合分析
         if "single_agent" in results["tests_completed"] and "multi_agent" in results["tests_completed"]:
@@ -103,25 +141,28 @@ class TestRunner:
                 print(f"❌ {error_msg}")
                 results["errors"].append(error_msg)
 
+        # ISO字符串仅供人读，不再重新解析回datetime算时长
         results["end_time"] = datetime.now().isoformat()
-        results["total_duration"] = (datetime.fromisoformat(results["end_time"]) -
-                                   datetime.fromisoformat(results["start_time"])).total_seconds()
+        results["total_duration"] = time.monotonic() - t0
 
         # 保存完整的测试结果
         complete_results_file = os.path.join(self.results_dir, f"complete_test_results_{timestamp}.json")
-        with open(complete_results_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        _dump_json(results, complete_results_file)
+
+        # 等后台写盘全部完成再打总结，保证退出时结果文件已落地
+        _write_queue.join()
 
         self._print_final_summary(results)
+        sys.stdout.flush()
 
         return results
 
     def _print_final_summary(self, results: Dict[str, Any]):
         """打印最终测试总结"""
 
-        print("\n" + "="*80)
+        print("\n" + _BANNER)
         print("🏆 PC NODE COMPREHENSIVE TEST SUMMARY")
-        print("="*80)
+        print(_BANNER)
 
         print(f"📅 Test Run ID: {results['test_run_id']}")
         print(f"⏱️  Total Duration: {results['total_duration']:.2f} seconds")
@@ -139,8 +180,10 @@ class TestRunner:
             print("\n📊 KEY PERFORMANCE INDICATORS:")
 
             if "test_summary" in analysis:
-                single_efficiency = analysis["test_summary"]["single_agent"].get("improvements", {}).get("token_efficiency", 0)
-                multi_efficiency = analysis["test_summary"]["multi_agent"].get("improvements", {}).get("token_efficiency", 0)
+                # 内层summary绑定到局部变量，避免重复的链式查找
+                test_summary = analysis["test_summary"]
+                single_efficiency = test_summary["single_agent"].get("improvements", {}).get("token_efficiency", 0)
+                multi_efficiency = test_summary["multi_agent"].get("improvements", {}).get("token_efficiency", 0)
 
                 print(f"🤖 Single Agent Token Efficiency: {single_efficiency:.1f}%")
                 print(f"👥 Multi-Agent Token Efficiency: {multi_efficiency:.1f}%")
@@ -156,8 +199,9 @@ class TestRunner:
         print("\n🎯 FINAL VERDICT:")
         if results["tests_completed"] and not results["errors"]:
             if "comprehensive_analysis" in results:
-                single_eff = results["comprehensive_analysis"]["test_summary"]["single_agent"].get("improvements", {}).get("token_efficiency", 0)
-                multi_eff = results["comprehensive_analysis"]["test_summary"]["multi_agent"].get("improvements", {}).get("token_efficiency", 0)
+                test_summary = results["comprehensive_analysis"]["test_summary"]
+                single_eff = test_summary["single_agent"].get("improvements", {}).get("token_efficiency", 0)
+                multi_eff = test_summary["multi_agent"].get("improvements", {}).get("token_efficiency", 0)
 
                 if single_eff > 20 and multi_eff > 20:
                     print("🌟 EXCELLENT: PC Node Context Sharing shows outstanding performance!")
@@ -172,9 +216,9 @@ class TestRunner:
         else:
             print("❌ INCOMPLETE: Some tests failed or were skipped. Review errors above.")
 
-        print("="*80)
+        print(_BANNER)
         print(f"📁 All results saved in: {self.results_dir}/")
-        print("="*80)
+        print(_BANNER)
 
 
 def main():
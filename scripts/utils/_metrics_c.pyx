@@ -0,0 +1,75 @@
+# cython: boundscheck=False, wraparound=False, cdivision=True
+"""
+C级的 ConversationResult → 统计量内核（可选加速器）
+
+一次C循环读取三个属性并就地累加，Python字节码调度、列表分配和
+NumPy开销全部消失——面向上万条会话的批量评估场景。
+
+构建: cythonize -i scripts/utils/_metrics_c.pyx
+未构建时performance_metrics自动回退到Python/NumPy路径。
+"""
+
+from libc.stdlib cimport malloc, free
+from libc.math cimport sqrt
+
+
+def compute(list results):
+    """单循环返回(avg_tokens, total_tokens, avg_rt, growth_pct, std_tokens, compression_eff)"""
+    cdef Py_ssize_t n = len(results)
+    cdef Py_ssize_t i, n_valid = 0, cr_n = 0, m
+    cdef double tok_s = 0.0, tok_s2 = 0.0, rt_s = 0.0, cr_s = 0.0
+    cdef double tok, mean, variance, std, avg_rt, growth, first_s
+    cdef double first_mean, second_mean, compression_eff
+    cdef double *valid
+    cdef object r, cr
+
+    if n == 0:
+        return 0.0, 0, 0.0, 0.0, 0.0, 0.0
+
+    valid = <double *> malloc(n * sizeof(double))
+    if valid == NULL:
+        raise MemoryError()
+
+    try:
+        for r in results:
+            tok = r.tokens
+            rt_s += r.response_time
+            cr = r.compression_ratio
+
+            if tok > 0:
+                valid[n_valid] = tok
+                n_valid += 1
+                tok_s += tok
+                tok_s2 += tok * tok
+
+            if cr is not None:
+                cr_s += <double> cr
+                cr_n += 1
+
+        avg_rt = rt_s / n
+
+        if n_valid == 0:
+            return 0.0, 0, avg_rt, 0.0, 0.0, (cr_s / cr_n if cr_n else 0.0)
+
+        mean = tok_s / n_valid
+        variance = tok_s2 / n_valid - mean * mean
+        if variance < 0.0:
+            variance = 0.0
+        std = sqrt(variance)
+
+        growth = 0.0
+        m = n_valid // 2
+        if m > 0:
+            first_s = 0.0
+            for i in range(m):
+                first_s += valid[i]
+            if first_s > 0.0:
+                first_mean = first_s / m
+                second_mean = (tok_s - first_s) / (n_valid - m)
+                growth = (second_mean - first_mean) / first_mean * 100.0
+
+        compression_eff = cr_s / cr_n if cr_n else 0.0
+
+        return mean, <long long> tok_s, avg_rt, growth, std, compression_eff
+    finally:
+        free(valid)
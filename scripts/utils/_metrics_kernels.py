@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Numba加速的指标统计内核（可选依赖）
+
+calculate_metrics的数值核心在小数组上受NumPy逐调用的调度开销支配，
+JIT成单循环后这部分开销消失。未安装numba时本模块导入失败，
+performance_metrics自动回退到NumPy路径。
+"""
+
+from numba import njit
+
+
+@njit(cache=True)
+def core_stats(tokens, response_times):
+    """单循环累加出(avg_tokens, total_tokens, avg_rt, growth_pct, std_tokens)
+
+    tokens为已过滤的正token列（float64），response_times为全量耗时列
+    """
+    rt_n = response_times.size
+    rt_s = 0.0
+    for i in range(rt_n):
+        rt_s += response_times[i]
+    avg_rt = rt_s / rt_n if rt_n else 0.0
+
+    n = tokens.size
+    if n == 0:
+        return 0.0, 0.0, avg_rt, 0.0, 0.0
+
+    s = 0.0
+    s2 = 0.0
+    for i in range(n):
+        v = float(tokens[i])  # int32列先提升，平方不会溢出
+        s += v
+        s2 += v * v
+    mean = s / n
+    var = s2 / n - mean * mean
+    if var < 0.0:
+        var = 0.0
+    std = var ** 0.5
+
+    growth = 0.0
+    if n > 1:
+        m = n // 2
+        first_s = 0.0
+        for i in range(m):
+            first_s += float(tokens[i])
+        first_mean = first_s / m
+        second_mean = (s - first_s) / (n - m)
+        if first_mean > 0.0:
+            growth = (second_mean - first_mean) / first_mean * 100.0
+
+    return mean, s, avg_rt, growth, std
@@ -5,8 +5,14 @@ PC Node Client - 封装PC Node的API调用
 
 import requests
 import json
+import threading
 import time
-from typing import List, Dict, Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
 
@@ -20,18 +26,98 @@ class ConversationResult:
     context_size: Optional[int] = None
 
 
+class TokenBucket:
+    """自适应令牌桶限速器
+
+    默认满速不等待；只有服务端真正回压(429/503)时才减速，
+    成功响应后再缓慢恢复，避免固定sleep造成的无谓空转
+    """
+
+    def __init__(self, rate: float = 50.0, capacity: float = 50.0):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取走一个令牌，不足时等待补充"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return
+            wait = (1.0 - self.tokens) / self.rate
+            self.tokens = 0.0
+        time.sleep(wait)
+
+    def throttle(self, retry_after: Optional[float] = None):
+        """收到429/503时调用：速率减半，并按Retry-After等待（如有）"""
+        with self._lock:
+            self.rate = max(self.rate * 0.5, 1.0)
+        if retry_after:
+            time.sleep(retry_after)
+
+    def relax(self):
+        """成功响应后向基准速率缓慢恢复"""
+        with self._lock:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate * 1.1)
+
+
 class PCNodeClient:
     def __init__(self, base_url: str = "http://localhost:3000"):
         self.base_url = base_url
         self.session = requests.Session()
 
+        # 并发测试会同时发起多个POST，urllib3默认每池10个连接会串行化传输；
+        # 调大连接池并依赖keep-alive复用，避免重复TCP握手
+        adapter = requests.adapters.HTTPAdapter(pool_connections=64, pool_maxsize=64)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Content-Type在session上设置一次，不必每次请求重建header字典
+        self.session.headers["Content-Type"] = "application/json"
+        self.timeout = 30.0
+
+        # 请求限速由服务端反馈驱动，取代tester里的固定sleep
+        self.limiter = TokenBucket(rate=50, capacity=50)
+
+        # payload静态字段按配置预序列化缓存，长跑时每轮只需编码messages部分
+        self._payload_prefix_cache = {}
+
+    def close(self):
+        """释放连接池"""
+        self.session.close()
+
+    HEALTH_CACHE_TTL = 5.0  # 秒
+
+    # 健康检查缓存挂在类上按base_url共享：每个tester各建一个client，
+    # 实例级缓存永远不会命中，跨实例共享才能省掉同一服务的重复GET
+    _health_cache: Dict[str, Tuple[float, bool]] = {}
+    _health_lock = threading.Lock()
+
     def health_check(self) -> bool:
-        """健康检查"""
+        """健康检查（结果按base_url缓存5秒，多个client探测同一服务免HTTP往返）"""
+        with PCNodeClient._health_lock:
+            ts, ok = PCNodeClient._health_cache.get(self.base_url, (0.0, False))
+            if time.monotonic() - ts < self.HEALTH_CACHE_TTL:
+                return ok
+
+        # GET在锁外：锁只保护缓存读写，一个慢/失联节点不能把其他线程的
+        # 健康检查也卡住；冷缓存下偶发的重复探测无害
         try:
-            response = self.session.get(f"{self.base_url}/health")
-            return response.status_code == 200
+            response = self.session.get(f"{self.base_url}/health", timeout=self.timeout)
+            ok = response.status_code == 200
         except Exception:
-            return False
+            ok = False
+
+        with PCNodeClient._health_lock:
+            PCNodeClient._health_cache[self.base_url] = (time.monotonic(), ok)
+        return ok
 
     def chat_completion(
         self,
@@ -44,31 +130,65 @@ class PCNodeClient:
     ) -> ConversationResult:
         """发送聊天完成请求"""
 
-        payload = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
-
-        if context_sharing and agent_id:
-            payload["context_sharing"] = True
-            payload["agent_id"] = agent_id
+        if orjson is not None:
+            # 静态字段（model/temperature/...）逐轮不变，取缓存的序列化前缀
+            # 拼上messages即可，免去每轮重建dict并整体json.dumps
+            key = (model, temperature, max_tokens, context_sharing, agent_id)
+            prefix = self._payload_prefix_cache.get(key)
+            if prefix is None:
+                static = {
+                    "model": model,
+                    "temperature": temperature,
+                    "max_tokens": max_tokens
+                }
+                if context_sharing and agent_id:
+                    static["context_sharing"] = True
+                    static["agent_id"] = agent_id
+                prefix = orjson.dumps(static)[:-1]  # 去掉结尾的'}'
+                self._payload_prefix_cache[key] = prefix
+            body = prefix + b',"messages":' + orjson.dumps(messages) + b'}'
+        else:
+            body = None
+            payload = {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens
+            }
+
+            if context_sharing and agent_id:
+                payload["context_sharing"] = True
+                payload["agent_id"] = agent_id
+
+        self.limiter.acquire()
 
         start_time = time.time()
         response_time = 0.0  # 初始化默认值
 
         try:
-            response = self.session.post(
-                f"{self.base_url}/v1/chat/completions",
-                json=payload,
-                headers={"Content-Type": "application/json"}
-            )
+            if body is not None:
+                response = self.session.post(
+                    f"{self.base_url}/v1/chat/completions",
+                    data=body,
+                    timeout=self.timeout
+                )
+            else:
+                response = self.session.post(
+                    f"{self.base_url}/v1/chat/completions",
+                    json=payload,
+                    timeout=self.timeout
+                )
 
             response_time = time.time() - start_time
 
             if response.status_code == 200:
-                data = response.json()
+                self.limiter.relax()
+
+                # orjson直接解析bytes，比stdlib json.loads快2-4倍；缺库时回退
+                if orjson is not None:
+                    data = orjson.loads(response.content)
+                else:
+                    data = response.json()
 
                 return ConversationResult(
                     content=data['choices'][0]['message']['content'],
@@ -78,6 +198,9 @@ class PCNodeClient:
                     context_size=data.get('context_size')
                 )
             else:
+                if response.status_code in (429, 503):
+                    retry_after = response.headers.get("Retry-After")
+                    self.limiter.throttle(float(retry_after) if retry_after else None)
                 raise Exception(f"API error: {response.status_code} - {response.text}")
 
         except Exception as e:
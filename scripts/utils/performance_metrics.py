@@ -3,15 +3,44 @@
 Performance Metrics - 性能指标计算工具
 """
 
+import hashlib
+import math
+import os
+import struct
+from operator import attrgetter
 from typing import List, Dict, Any, Tuple
 import numpy as np
 from dataclasses import dataclass
 from utils.pc_client import ConversationResult
 
+try:
+    # 可选的numba JIT内核：小数组上比逐个NumPy调用快一个量级
+    from utils._metrics_kernels import core_stats as _core_stats
+except ImportError:
+    _core_stats = None
 
-@dataclass
+try:
+    # 可选的pyarrow：用于把SoA列落盘成Parquet缓存
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    # 可选的Cython扩展（cythonize -i utils/_metrics_c.pyx）：
+    # 整条 结果列表→统计量 流水线压成一个C循环，面向上万条会话的批量评估
+    from utils._metrics_c import compute as _compute_c
+except ImportError:
+    _compute_c = None
+
+
+@dataclass(slots=True, frozen=True)
 class PerformanceMetrics:
-    """性能指标数据类"""
+    """性能指标数据类
+
+    slots省掉每实例的__dict__并加速属性访问；frozen使其可哈希、可安全缓存。
+    所有字段保证是原生Python标量（不混入numpy.float64）
+    """
     avg_tokens: float
     total_tokens: int
     avg_response_time: float
@@ -20,48 +49,314 @@ class PerformanceMetrics:
     stability_coefficient: float  # 变异系数
 
 
+# 按结果列表身份memoize指标：同一列表会在对比、图表、报告之间反复计算。
+# key是(id, len)，条目里同时持有列表本身的强引用——只要条目在，
+# 列表就不会被回收，id也就不可能被复用到别的列表上。
+# 满了整体清空，保持实现简单，保留的内存也因此有界
+_metrics_cache: Dict[Tuple[int, int], Tuple[List[ConversationResult], PerformanceMetrics]] = {}
+_METRICS_CACHE_MAX = 128
+
+# attrgetter把描述符查找缓存在C层，一次调用取回三个字段，
+# 比逐属性的LOAD_ATTR字节码便宜
+_get_cols = attrgetter('tokens', 'response_time', 'compression_ratio')
+
+# 低于该规模时走纯Python统计路径（NumPy调度开销占主导的区间）
+_SMALL_N_THRESHOLD = 256
+
+
+def _m2d(m: PerformanceMetrics, total: int) -> Dict[str, Any]:
+    """指标转场景dict，compare_scenarios的两个场景共用同一份构建逻辑"""
+    return {
+        "avg_tokens": m.avg_tokens,
+        "total_tokens": total,
+        "avg_response_time": m.avg_response_time,
+        "token_growth_rate": m.token_growth_rate,
+        "compression_efficiency": m.compression_efficiency,
+        "stability_coefficient": m.stability_coefficient
+    }
+
+
 class MetricsCalculator:
     """性能指标计算器"""
 
+    @staticmethod
+    def clear_metrics_cache():
+        """清空指标memoize缓存（结果列表被就地修改后调用，也释放缓存持有的列表引用）"""
+        _metrics_cache.clear()
+
+    @staticmethod
+    def _to_soa(results: List[ConversationResult]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """一次遍历把AoS的结果列表抽成SoA列数组（tokens/耗时/压缩比）
+
+        原先四个列表推导各自走一遍results，属性访问重复四次；
+        这里单循环填进预分配的连续float64缓冲，下游统计直接吃数组。
+        压缩比列用NaN标记缺失（None），免去动态增长的Python列表
+        """
+        # tokens远小于2^31、耗时精度毫秒级即可：窄类型把统计扫描的
+        # 内存带宽直接减半，求和仍在float64/int64里累加保证精度
+        n = len(results)
+        tokens = np.empty(n, dtype=np.int32)
+        response_times = np.empty(n, dtype=np.float32)
+        compression_ratios = np.empty(n, dtype=np.float64)
+
+        for i, r in enumerate(results):
+            tok, rt, cr = _get_cols(r)
+            tokens[i] = tok
+            response_times[i] = rt
+            compression_ratios[i] = cr if cr is not None else np.nan
+
+        return tokens, response_times, compression_ratios
+
+    @staticmethod
+    def load_or_build_soa(
+        results: List[ConversationResult],
+        cache_dir: str = "metrics_cache"
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """按内容哈希把SoA列缓存成Parquet列存文件
+
+        迭代指标公式的工作流里同一批结果会被反复读取，命中缓存时
+        直接从Parquet读回连续数组，跳过整个AoS遍历。
+        未安装pyarrow时退化为纯内存抽取（结果等价，只是不落盘）
+        """
+        if pa is None:
+            return MetricsCalculator._to_soa(results)
+
+        h = hashlib.blake2b(digest_size=16)
+        for r in results:
+            tok, rt, cr = _get_cols(r)
+            h.update(struct.pack(
+                "<qdd", tok, rt, cr if cr is not None else float("nan")))
+        path = os.path.join(cache_dir, f"soa_{h.hexdigest()}.parquet")
+
+        if os.path.exists(path):
+            table = pq.read_table(path)
+            return (table["tokens"].to_numpy(),
+                    table["response_time"].to_numpy(),
+                    table["compression_ratio"].to_numpy())
+
+        tokens, response_times, compression_ratios = MetricsCalculator._to_soa(results)
+        os.makedirs(cache_dir, exist_ok=True)
+        pq.write_table(pa.table({
+            "tokens": tokens,
+            "response_time": response_times,
+            "compression_ratio": compression_ratios
+        }), path)
+
+        return tokens, response_times, compression_ratios
+
     @staticmethod
     def calculate_metrics(results: List[ConversationResult]) -> PerformanceMetrics:
         """计算基础性能指标"""
         if not results:
             return PerformanceMetrics(0, 0, 0, 0, 0, 0)
 
-        tokens = [r.tokens for r in results if r.tokens > 0]
-        response_times = [r.response_time for r in results]
-
-        # 基础统计
-        avg_tokens = np.mean(tokens) if tokens else 0
-        total_tokens = sum(tokens)
-        avg_response_time = np.mean(response_times)
-
-        # Token增长率计算
-        token_growth_rate = 0
-        if len(tokens) > 1:
-            first_half = tokens[:len(tokens)//2]
-            second_half = tokens[len(tokens)//2:]
-            if first_half and second_half:
-                growth = (np.mean(second_half) - np.mean(first_half)) / np.mean(first_half)
-                token_growth_rate = growth * 100
-
-        # 压缩效率
-        compression_ratios = [r.compression_ratio for r in results if r.compression_ratio is not None]
-        compression_efficiency = np.mean(compression_ratios) if compression_ratios else 0
-
-        # 稳定性系数（变异系数）
-        stability_coefficient = (np.std(tokens) / avg_tokens * 100) if avg_tokens > 0 else 0
-
-        return PerformanceMetrics(
-            avg_tokens=avg_tokens,
-            total_tokens=total_tokens,
-            avg_response_time=avg_response_time,
-            token_growth_rate=token_growth_rate,
-            compression_efficiency=compression_efficiency,
-            stability_coefficient=stability_coefficient
+        cache_key = (id(results), len(results))
+        cached = _metrics_cache.get(cache_key)
+        if cached is not None:
+            return cached[1]
+
+        if _compute_c is not None:
+            # C内核单循环覆盖全部统计量，任何规模下都是最快路径
+            (avg_tokens, total_tokens, avg_response_time, token_growth_rate,
+             std_tokens, compression_efficiency) = _compute_c(results)
+            stability_coefficient = (std_tokens / avg_tokens * 100) if avg_tokens > 0 else 0
+        elif len(results) < _SMALL_N_THRESHOLD:
+            # 小会话（典型只有几十轮）上NumPy的逐调用调度开销比算术本身贵，
+            # 一趟纯Python循环把全部累加量算完反而更快
+            valid = []
+            tok_s = 0.0
+            tok_s2 = 0.0
+            rt_s = 0.0
+            cr_s = 0.0
+            cr_n = 0
+
+            for r in results:
+                tok, rt, cr = _get_cols(r)
+                rt_s += rt
+                if tok > 0:
+                    valid.append(tok)
+                    tok_s += tok
+                    tok_s2 += tok * tok
+                if cr is not None:
+                    cr_s += cr
+                    cr_n += 1
+
+            n_valid = len(valid)
+            avg_tokens = tok_s / n_valid if n_valid else 0.0
+            variance = (tok_s2 / n_valid - avg_tokens * avg_tokens) if n_valid else 0.0
+            std_tokens = math.sqrt(max(variance, 0.0))
+            total_tokens = int(tok_s)
+            avg_response_time = rt_s / len(results)
+            compression_efficiency = cr_s / cr_n if cr_n else 0
+
+            token_growth_rate = 0
+            m = n_valid // 2
+            if m > 0:
+                first_s = float(sum(valid[:m]))
+                if first_s > 0:
+                    first_mean = first_s / m
+                    second_mean = (tok_s - first_s) / (n_valid - m)
+                    token_growth_rate = (second_mean - first_mean) / first_mean * 100
+
+            stability_coefficient = (std_tokens / avg_tokens * 100) if avg_tokens > 0 else 0
+        else:
+            tokens_arr, response_times, compression_ratios = MetricsCalculator._to_soa(results)
+            # tokens>0的判定全模块只在这里（和batch版）以向量化比较各做一次，
+            # 下游统计、对比、成本分析全部消费过滤后的列或其总和
+            valid_mask = tokens_arr > 0
+            tokens = tokens_arr[valid_mask]
+
+            if _core_stats is not None:
+                # JIT内核一趟循环算完全部数值统计
+                avg_tokens, s, avg_response_time, token_growth_rate, std_tokens = \
+                    _core_stats(tokens, response_times)
+                total_tokens = int(s)
+            else:
+                # 基础统计：一次sum加一次平方和，均值/标准差解析导出——
+                # 省掉mean/std/sum三次独立扫描（小数组上大头是NumPy调度开销）
+                n_valid = tokens.size
+                if n_valid:
+                    s = float(tokens.sum(dtype=np.int64))
+                    s2 = float(np.multiply(tokens, tokens, dtype=np.int64).sum())
+                    avg_tokens = s / n_valid
+                    variance = s2 / n_valid - avg_tokens * avg_tokens
+                    std_tokens = math.sqrt(max(variance, 0.0))
+                else:
+                    s = 0.0
+                    avg_tokens = 0.0
+                    std_tokens = 0.0
+                total_tokens = int(s)
+                avg_response_time = float(response_times.sum(dtype=np.float64)) / response_times.size
+
+                # Token增长率：复用上面的总和s，只对前半段再求一次和，
+                # 后半段均值用减法导出——免去两次切片扫描和分配
+                token_growth_rate = 0
+                m = n_valid // 2
+                if m > 0:
+                    first_s = float(tokens[:m].sum(dtype=np.int64))
+                    if first_s > 0:
+                        first_mean = first_s / m
+                        second_mean = (s - first_s) / (n_valid - m)
+                        token_growth_rate = (second_mean - first_mean) / first_mean * 100
+
+            # 压缩效率：缺失值是NaN，一次nanmean向量化求均值
+            if np.isfinite(compression_ratios).any():
+                compression_efficiency = float(np.nanmean(compression_ratios))
+            else:
+                compression_efficiency = 0
+
+            # 稳定性系数（变异系数），复用上面解析出的标准差
+            stability_coefficient = (std_tokens / avg_tokens * 100) if avg_tokens > 0 else 0
+
+        metrics = PerformanceMetrics(
+            avg_tokens=float(avg_tokens),
+            total_tokens=int(total_tokens),
+            avg_response_time=float(avg_response_time),
+            token_growth_rate=float(token_growth_rate),
+            compression_efficiency=float(compression_efficiency),
+            stability_coefficient=float(stability_coefficient)
         )
 
+        if len(_metrics_cache) >= _METRICS_CACHE_MAX:
+            _metrics_cache.clear()
+        _metrics_cache[cache_key] = (results, metrics)
+
+        return metrics
+
+    @staticmethod
+    def calculate_metrics_batch(
+        scenario_results: List[List[ConversationResult]]
+    ) -> List[PerformanceMetrics]:
+        """批量计算多个场景的指标
+
+        把所有场景的列拼成一条一维数组加段偏移表，用np.add.reduceat
+        分段求和/平方和，K个场景只付一次NumPy调度开销。
+        增长率依赖段内顺序，留在小K循环里按段算
+        """
+        if not scenario_results:
+            return []
+
+        cached = [_metrics_cache.get((id(rs), len(rs))) for rs in scenario_results]
+        if all(entry is not None for entry in cached):
+            return [entry[1] for entry in cached]
+
+        k = len(scenario_results)
+        counts = np.fromiter((len(rs) for rs in scenario_results), dtype=np.int64, count=k)
+        if (counts == 0).any():
+            # 空场景会产生空段，reduceat语义不适用，退回逐场景路径
+            return [MetricsCalculator.calculate_metrics(rs) for rs in scenario_results]
+
+        total_n = int(counts.sum())
+        tokens = np.empty(total_n, dtype=np.float64)
+        rts = np.empty(total_n, dtype=np.float64)
+        crs = np.empty(total_n, dtype=np.float64)
+
+        pos = 0
+        segments = []
+        for rs in scenario_results:
+            t, rt, cr = MetricsCalculator._to_soa(rs)
+            nxt = pos + t.size
+            tokens[pos:nxt] = t
+            rts[pos:nxt] = rt
+            crs[pos:nxt] = cr
+            segments.append((pos, nxt))
+            pos = nxt
+
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        # 零token轮次在求和里天然为0，均值则按正token数归一
+        valid = tokens > 0
+        vt = np.where(valid, tokens, 0.0)
+        sums = np.add.reduceat(vt, offsets)
+        sq_sums = np.add.reduceat(vt * vt, offsets)
+        valid_counts = np.add.reduceat(valid.astype(np.float64), offsets)
+        rt_sums = np.add.reduceat(rts, offsets)
+
+        cr_finite = np.isfinite(crs)
+        cr_sums = np.add.reduceat(np.where(cr_finite, crs, 0.0), offsets)
+        cr_counts = np.add.reduceat(cr_finite.astype(np.float64), offsets)
+
+        safe_counts = np.maximum(valid_counts, 1.0)
+        means = sums / safe_counts
+        variances = np.maximum(sq_sums / safe_counts - means * means, 0.0)
+        stds = np.sqrt(variances)
+        avg_rts = rt_sums / counts
+        cr_means = np.where(cr_counts > 0, cr_sums / np.maximum(cr_counts, 1.0), 0.0)
+
+        metrics = []
+        for j, rs in enumerate(scenario_results):
+            if cached[j] is not None:
+                metrics.append(cached[j])
+                continue
+
+            start, end = segments[j]
+            seg_valid = vt[start:end][valid[start:end]]
+
+            growth = 0.0
+            m = seg_valid.size // 2
+            if m > 0:
+                first_s = float(seg_valid[:m].sum())
+                if first_s > 0:
+                    first_mean = first_s / m
+                    second_mean = (float(sums[j]) - first_s) / (seg_valid.size - m)
+                    growth = (second_mean - first_mean) / first_mean * 100
+
+            mean_j = float(means[j]) if valid_counts[j] > 0 else 0.0
+            result = PerformanceMetrics(
+                avg_tokens=mean_j,
+                total_tokens=int(sums[j]),
+                avg_response_time=float(avg_rts[j]),
+                token_growth_rate=float(growth),
+                compression_efficiency=float(cr_means[j]),
+                stability_coefficient=float(stds[j] / mean_j * 100) if mean_j > 0 else 0.0
+            )
+            if len(_metrics_cache) >= _METRICS_CACHE_MAX:
+                _metrics_cache.clear()
+            _metrics_cache[(id(rs), len(rs))] = (rs, result)
+            metrics.append(result)
+
+        return metrics
+
     @staticmethod
     def compare_scenarios(
         scenario_a: List[ConversationResult],
@@ -71,12 +366,13 @@ class MetricsCalculator:
     ) -> Dict[str, Any]:
         """比较两个测试场景"""
 
-        metrics_a = MetricsCalculator.calculate_metrics(scenario_a)
-        metrics_b = MetricsCalculator.calculate_metrics(scenario_b)
+        metrics_a, metrics_b = MetricsCalculator.calculate_metrics_batch(
+            [scenario_a, scenario_b])
 
         # 🔍 修正：直接用总token数进行对比，更直观
-        total_tokens_a = sum(r.tokens for r in scenario_a if r.tokens > 0)
-        total_tokens_b = sum(r.tokens for r in scenario_b if r.tokens > 0)
+        # calculate_metrics已按同样的>0过滤算出总量，直接复用，不再重扫两遍
+        total_tokens_a = metrics_a.total_tokens
+        total_tokens_b = metrics_b.total_tokens
 
         # 计算改进百分比 - 基于总token消耗
         token_improvement = ((total_tokens_a - total_tokens_b) / total_tokens_a * 100) if total_tokens_a > 0 else 0
@@ -87,22 +383,8 @@ class MetricsCalculator:
 
         return {
             "scenarios": {
-                scenario_a_name: {
-                    "avg_tokens": metrics_a.avg_tokens,
-                    "total_tokens": total_tokens_a,
-                    "avg_response_time": metrics_a.avg_response_time,
-                    "token_growth_rate": metrics_a.token_growth_rate,
-                    "compression_efficiency": metrics_a.compression_efficiency,
-                    "stability_coefficient": metrics_a.stability_coefficient
-                },
-                scenario_b_name: {
-                    "avg_tokens": metrics_b.avg_tokens,
-                    "total_tokens": total_tokens_b,
-                    "avg_response_time": metrics_b.avg_response_time,
-                    "token_growth_rate": metrics_b.token_growth_rate,
-                    "compression_efficiency": metrics_b.compression_efficiency,
-                    "stability_coefficient": metrics_b.stability_coefficient
-                }
+                scenario_a_name: _m2d(metrics_a, total_tokens_a),
+                scenario_b_name: _m2d(metrics_b, total_tokens_b)
             },
             "improvements": {
                 "token_efficiency": token_improvement,
@@ -116,13 +398,40 @@ class MetricsCalculator:
             }
         }
 
+    @staticmethod
+    def compare_scenarios_table(
+        scenarios: Dict[str, List[ConversationResult]]
+    ) -> "pa.Table":
+        """把任意多个场景的指标打成pyarrow列存表（每场景一行）
+
+        下游仪表盘/入库可零拷贝地对整列做向量化对比，
+        不必再逐层解析嵌套dict。需要pyarrow；dict版API保持不变
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for compare_scenarios_table")
+
+        names = list(scenarios)
+        metrics = MetricsCalculator.calculate_metrics_batch(list(scenarios.values()))
+
+        return pa.table({
+            "scenario": names,
+            "avg_tokens": [m.avg_tokens for m in metrics],
+            "total_tokens": [m.total_tokens for m in metrics],
+            "avg_response_time": [m.avg_response_time for m in metrics],
+            "token_growth_rate": [m.token_growth_rate for m in metrics],
+            "compression_efficiency": [m.compression_efficiency for m in metrics],
+            "stability_coefficient": [m.stability_coefficient for m in metrics]
+        })
+
     @staticmethod
     def calculate_cost_analysis(
         results: List[ConversationResult],
         cost_per_1k_tokens: float = 0.002  # GPT-3.5-turbo pricing
     ) -> Dict[str, float]:
         """计算成本分析"""
-        total_tokens = sum(r.tokens for r in results if r.tokens > 0)
+        # 复用calculate_metrics的SoA求和（含memoize），
+        # 不再用逐元素带分支的Python生成器重新累加
+        total_tokens = MetricsCalculator.calculate_metrics(results).total_tokens
         estimated_cost = (total_tokens / 1000) * cost_per_1k_tokens
 
         return {